@@ -16,7 +16,22 @@ class ETLConfig:
     
     # API and processing settings
     MAX_CHUNK_DAYS = 7         # Maximum days per Facebook API request
-    RATE_LIMIT_DELAY = 30       # Seconds between API calls
+    RATE_LIMIT_DELAY = 30       # Minimum seconds to back off once over API_USAGE_THRESHOLD or rate limited
+    MAX_CONCURRENT_REQUESTS = 5 # Chunks fetched from the Facebook API in parallel
+    API_USAGE_THRESHOLD = 75    # Back off once the usage headers report this percentage (call count, CPU or time)
+    API_TIMEOUT = 120           # Seconds before a Facebook API request times out
+    REPORT_POLL_DELAY = 2       # Initial seconds between async report status checks
+    REPORT_POLL_MAX_DELAY = 30  # Upper bound for the exponential polling backoff
+    REPORT_TIMEOUT = 600        # Seconds to wait for an async report to complete
+    REPORT_MAX_RETRIES = 3      # Attempts for reports Facebook asks us to retry
+    REPORT_PAGE_SIZE = 500      # Rows per page when reading report results
+    FB_BATCH_SIZE = 50          # Requests per Graph API batch call (Facebook's maximum)
+    STAGING_TABLE_EXPIRATION_HOURS = 1  # Staging tables left by an interrupted run expire after this
+    METADATA_CACHE_TTL = 300    # Seconds to reuse partition metadata read from BigQuery
+    PARQUET_COMPRESSION = 'zstd' # Codec for the Parquet file uploaded to BigQuery
+    MAX_PARTITION_LOADS = 31    # Replace up to this many days partition by partition, MERGE beyond
+    BQ_RATE_LIMIT_RETRY_TIMEOUT = 60 # Seconds to keep retrying BigQuery writes rejected by a rate limit
+    COALESCE_GAP_DAYS = 2       # Fetch missing ranges this close together as one range
     
     # Filtering settings
     MIN_SPEND_THRESHOLD = 0.01  # Minimum spend ($0.01) to include campaign/ad in results
@@ -1,24 +1,118 @@
-import signal
+import json
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 from facebook_business.api import FacebookAdsApi
+from facebook_business.session import FacebookSession
 from facebook_business.adobjects.adaccount import AdAccount
 from facebook_business.adobjects.adsinsights import AdsInsights
+from facebook_business.adobjects.adreportrun import AdReportRun
+from facebook_business.exceptions import FacebookRequestError
+from google.api_core import exceptions as gcp_exceptions
+from google.api_core.retry import Retry
 from google.cloud import bigquery
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import os
 import dotenv 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 import time
-from typing import List, Set
+from typing import Dict, FrozenSet, List, Optional, Set
 from config import ETLConfig
 
 # Load environment variables from .env file
 dotenv.load_dotenv()
 
-# Add timeout handler for API requests
-class APITimeoutError(Exception):
-    pass
+class ThrottledFacebookAdsApi(FacebookAdsApi):
+    """FacebookAdsApi that records the rate limit usage sent back with every response, errors included"""
+    
+    def call(self, *args, **kwargs):
+        try:
+            response = super().call(*args, **kwargs)
+        except FacebookRequestError as e:
+            record_api_usage(e.http_headers())
+            raise
+        record_api_usage(response.headers())
+        return response
+
+# Latest usage reported by Facebook in the x-business-use-case-usage and x-app-usage headers
+api_usage = {'call_count': 0, 'estimated_time_to_regain_access': 0}
+api_usage_lock = threading.Lock()
+
+# Error codes Facebook uses for app (4), user (17) and business use case (80000-80014) throttling
+rate_limit_error_codes = frozenset([4, 17, 613, *range(80000, 80015)])
+
+def parse_usage_header(headers, name: str):
+    """Decode one of Facebook's JSON usage headers, or return None when absent or malformed"""
+    raw_usage = headers.get(name)
+    if not raw_usage:
+        return None
+    try:
+        return json.loads(raw_usage)
+    except ValueError:
+        return None
+
+def record_api_usage(headers):
+    """
+    Store the highest usage percentage (calls, CPU time or total time) across the app and the account's use cases
 
-def timeout_handler(signum, frame):
-    raise APITimeoutError("API request timed out")
+    Accepts the headers of a plain response, or the [{'name': ..., 'value': ...}]
+    list that each inner response of a Graph batch request carries.
+    """
+    if not headers:
+        return
+    if isinstance(headers, list):
+        headers = CaseInsensitiveDict((header.get('name'), header.get('value'))
+                                      for header in headers if isinstance(header, dict))
+    
+    # The business use case header holds a list of use cases per business, the app header a single one
+    use_cases = []
+    business_usage = parse_usage_header(headers, 'x-business-use-case-usage')
+    if isinstance(business_usage, dict):
+        for business_use_cases in business_usage.values():
+            use_cases.extend(business_use_cases)
+    app_usage = parse_usage_header(headers, 'x-app-usage')
+    if isinstance(app_usage, dict):
+        use_cases.append(app_usage)
+    if not use_cases:
+        return
+    
+    call_count = 0
+    regain_minutes = 0
+    for use_case in use_cases:
+        call_count = max(call_count, use_case.get('call_count', 0),
+                         use_case.get('total_cputime', 0), use_case.get('total_time', 0))
+        regain_minutes = max(regain_minutes, use_case.get('estimated_time_to_regain_access', 0))
+    
+    with api_usage_lock:
+        api_usage['call_count'] = call_count
+        api_usage['estimated_time_to_regain_access'] = regain_minutes
+
+def wait_for_api_budget(throttled: bool = False):
+    """
+    Sleep only when Facebook reports the account is close to its rate limit
+
+    With throttled set (after a rate limit error) it always waits, for at
+    least RATE_LIMIT_DELAY, even if no usage header came back.
+    """
+    with api_usage_lock:
+        call_count = api_usage['call_count']
+        regain_minutes = api_usage['estimated_time_to_regain_access']
+    
+    if call_count <= ETLConfig.API_USAGE_THRESHOLD and not throttled:
+        return
+    
+    delay = max(regain_minutes * 60, ETLConfig.RATE_LIMIT_DELAY)
+    reason = f"API usage at {call_count}%" if call_count > ETLConfig.API_USAGE_THRESHOLD else "Rate limited"
+    print(f"⏳ {reason}, waiting {delay} seconds...")
+    time.sleep(delay)
 
 # Facebook API setup
 app_id = os.getenv('FACEBOOK_APP_ID')
@@ -26,14 +120,67 @@ app_secret = os.getenv('FACEBOOK_APP_SECRET')
 access_token = os.getenv('FACEBOOK_ACCESS_TOKEN')
 ad_account_id = os.getenv('FACEBOOK_AD_ACCOUNT_ID')
 
-FacebookAdsApi.init(app_id, app_secret, access_token, api_version=ETLConfig.API_VERSION)
-account = AdAccount(ad_account_id)
+def mount_connection_pool(session: FacebookSession, pool_size: int):
+    """
+    Keep one pooled keep-alive connection per worker so chunks reuse TLS sessions.
+    
+    The adapter is only replaced when pool_size changes, and the old one's
+    connections are closed rather than left open on the shared session.
+    """
+    current = session.requests.get_adapter('https://')
+    if isinstance(current, HTTPAdapter) and getattr(current, 'pool_size', None) == pool_size:
+        return
+    
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+    adapter.pool_size = pool_size
+    session.requests.mount('https://', adapter)
+    current.close()
+
+@lru_cache(maxsize=1)
+def fb_session() -> FacebookSession:
+    """Create the Facebook HTTP session on first use"""
+    session = FacebookSession(app_id, app_secret, access_token, timeout=ETLConfig.API_TIMEOUT)
+    mount_connection_pool(session, ETLConfig.MAX_CONCURRENT_REQUESTS)
+    return session
+
+@lru_cache(maxsize=1)
+def fb_api() -> FacebookAdsApi:
+    """Create the Facebook API on first use, so importing this module needs no credentials"""
+    api = ThrottledFacebookAdsApi(fb_session(), api_version=ETLConfig.API_VERSION)
+    FacebookAdsApi.set_default_api(api)
+    return api
+
+@lru_cache(maxsize=1)
+def fb_account() -> AdAccount:
+    """Get the ad account, setting up the Facebook API on first use"""
+    return AdAccount(ad_account_id, api=fb_api())
 
 # BigQuery setup
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-client = bigquery.Client()
+@lru_cache(maxsize=1)
+def bq_client() -> bigquery.Client:
+    """Create the BigQuery client the first time it is needed (reads GOOGLE_APPLICATION_CREDENTIALS)"""
+    return bigquery.Client()
+
+@lru_cache(maxsize=64)
+def table_reference(target_table_id: str) -> bigquery.TableReference:
+    """Reference a table of the dataset, built once per table ID"""
+    return bigquery.DatasetReference(bq_client().project, dataset_id).table(target_table_id)
+
+@lru_cache(maxsize=None)
+def load_job_config(write_disposition) -> bigquery.LoadJobConfig:
+    """Parquet load job config for a write disposition, shared by every load (the client copies it per job)"""
+    job_config = bigquery.LoadJobConfig()
+    job_config.schema = schema
+    job_config.source_format = bigquery.SourceFormat.PARQUET
+    job_config.write_disposition = write_disposition
+    return job_config
+
 dataset_id = ETLConfig.DATASET_ID
 table_id = ETLConfig.TABLE_ID
+daily_summary_table_id = f'{table_id}_daily_summary'
+
+# Shared one-day step for date arithmetic
+ONE_DAY = timedelta(days=1)
 
 # Define the schema for BigQuery table
 schema = [
@@ -68,12 +215,58 @@ schema = [
     bigquery.SchemaField('cost_per_purchase', 'FLOAT'),
 ]
 
+# Within each day partition, keep rows clustered by the ad hierarchy so
+# filters and MERGE predicates on it only read the matching blocks
+clustering_fields = ['campaign', 'adset_name', 'ad_name']
+
+# Arrow equivalents of the BigQuery column types, used to build Parquet load files
+arrow_types = {
+    'STRING': pa.string(),
+    'DATE': pa.date32(),
+    'INTEGER': pa.int64(),
+    'FLOAT': pa.float64(),
+}
+
+arrow_schema = pa.schema([pa.field(field.name, arrow_types[field.field_type]) for field in schema])
+
+# Columns copied as raw API values (numbers arrive as strings) and cast column-wise
+api_raw_columns = {
+    'date': 'date_start',
+    'impressions': 'impressions',
+    'clicks': 'clicks',
+    'spend': 'spend',
+    'cpc': 'cpc',
+    'cpm': 'cpm',
+    'ctr': 'ctr',
+    'frequency': 'frequency',
+    'unique_ctr': 'unique_ctr',
+}
+
+# Every schema column read straight from an insight field
+api_field_columns = {
+    'account_name': 'account_name',
+    'campaign': 'campaign_name',
+    'adset_name': 'adset_name',
+    'ad_name': 'ad_name',
+    **api_raw_columns,
+}
+
 # Priority actions to extract from Facebook API
 action_priority = [
     'lead', 'landing_page_view', 'add_to_cart', 'initiate_checkout',
     'add_payment_info', 'subscribe', 'complete_registration', 'purchase'
 ]
 
+# Schema count and cost columns for each priority action
+action_columns = []
+for action_type in action_priority:
+    if action_type == 'landing_page_view':
+        action_columns.append((action_type, 'landing_page_views', 'cost_per_landing_page_view'))
+    elif action_type == 'lead':
+        action_columns.append((action_type, 'leads', 'cost_per_lead'))
+    else:
+        action_columns.append((action_type, action_type, f'cost_per_{action_type}'))
+
 # Define the fields we want to fetch
 fields = [
     AdsInsights.Field.account_name,
@@ -93,12 +286,13 @@ fields = [
     AdsInsights.Field.action_values,
 ]
 
+@lru_cache(maxsize=1)
 def create_table_if_not_exists():
-    """Create BigQuery table if it doesn't exist"""
-    table_ref = client.dataset(dataset_id).table(table_id)
+    """Create BigQuery table if it doesn't exist (checked once per process)"""
+    table_ref = table_reference(table_id)
     
     try:
-        client.get_table(table_ref)
+        table = bq_client().get_table(table_ref)
         print(f"Table {dataset_id}.{table_id} already exists")
     except Exception:
         print(f"Creating table {dataset_id}.{table_id}")
@@ -109,22 +303,123 @@ def create_table_if_not_exists():
             type_=bigquery.TimePartitioningType.DAY,
             field="date"
         )
+        table.clustering_fields = clustering_fields
         
-        client.create_table(table)
+        table = bq_client().create_table(table)
         print(f"Created table {dataset_id}.{table_id}")
+    
+    # Tables created before clustering was added pick it up for newly written data
+    if table.clustering_fields != clustering_fields:
+        table.clustering_fields = clustering_fields
+        bq_client().update_table(table, ['clustering_fields'])
+        print(f"Clustered table {dataset_id}.{table_id} by {', '.join(clustering_fields)}")
+    
+    create_daily_summary_if_not_exists()
+
+def create_daily_summary_if_not_exists():
+    """
+    Create the materialized view of per-day totals read by status reports.
+    
+    BigQuery keeps the view up to date itself, refreshing only the
+    partitions a load or delete touched, so status queries scan one row per
+    day instead of every ad row. The view is optional: errors are logged
+    and status falls back to aggregating the table.
+    """
+    view_ref = table_reference(daily_summary_table_id)
+    
+    try:
+        bq_client().get_table(view_ref)
+        return
+    except gcp_exceptions.NotFound:
+        pass
+    except gcp_exceptions.GoogleAPIError as e:
+        print(f"⚠️  Could not check daily summary view {dataset_id}.{daily_summary_table_id}: {e}")
+        return
+    
+    view = bigquery.Table(view_ref)
+    view.mview_query = f"""
+    SELECT
+        date,
+        COUNT(*) AS total_rows,
+        SUM(spend) AS total_spend,
+        SUM(impressions) AS total_impressions,
+        SUM(clicks) AS total_clicks
+    FROM `{bq_client().project}.{dataset_id}.{table_id}`
+    GROUP BY date
+    """
+    view.time_partitioning = bigquery.TimePartitioning(
+        type_=bigquery.TimePartitioningType.DAY,
+        field="date"
+    )
+    
+    try:
+        bq_client().create_table(view)
+        print(f"Created daily summary view {dataset_id}.{daily_summary_table_id}")
+    except gcp_exceptions.GoogleAPIError as e:
+        print(f"⚠️  Could not create daily summary view {dataset_id}.{daily_summary_table_id}: {e}")
+
+# Partition dates read from BigQuery, reused until they expire or the table is written
+partition_dates_cache = {'dates': None, 'fetched_at': 0.0}
+partition_dates_lock = threading.Lock()
+
+def invalidate_partition_dates():
+    """Forget the cached partition dates after the table has been written"""
+    with partition_dates_lock:
+        partition_dates_cache['dates'] = None
 
-def get_existing_dates(last_n_days=10) -> Set[datetime.date]:
-    """Get the last N dates from BigQuery table for efficiency"""
+def get_partition_dates() -> FrozenSet[datetime.date]:
+    """
+    Get every date that has rows in BigQuery from the table's partition metadata
+
+    INFORMATION_SCHEMA.PARTITIONS lists one row per day partition, so this
+    reads metadata only instead of scanning the date column of the table.
+    The result is cached for METADATA_CACHE_TTL seconds, so the planning
+    steps of a run share one lookup.
+    """
+    with partition_dates_lock:
+        dates = partition_dates_cache['dates']
+        if dates is not None and time.time() - partition_dates_cache['fetched_at'] < ETLConfig.METADATA_CACHE_TTL:
+            return dates
+    
     query = f"""
-    SELECT DISTINCT date
-    FROM `{dataset_id}.{table_id}`
-    ORDER BY date DESC
-    LIMIT {last_n_days}
+    SELECT PARSE_DATE('%Y%m%d', partition_id) AS date
+    FROM `{dataset_id}.INFORMATION_SCHEMA.PARTITIONS`
+    WHERE table_name = @table_name
+      AND partition_id NOT IN ('__NULL__', '__UNPARTITIONED__')
+      AND total_rows > 0
+    """
+    job_config = bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ScalarQueryParameter('table_name', 'STRING', table_id),
+    ])
+    
+    results = bq_client().query(query, job_config=job_config)
+    dates = frozenset(row.date for row in results)
+    
+    with partition_dates_lock:
+        partition_dates_cache['dates'] = dates
+        partition_dates_cache['fetched_at'] = time.time()
+    return dates
+
+def get_existing_dates(last_n_days=10, start_date: datetime.date = None,
+                       end_date: datetime.date = None) -> FrozenSet[datetime.date]:
+    """
+    Get the dates loaded in the last N days of data from BigQuery table for efficiency
+    
+    The window ends at the latest loaded date, like the monitoring window in
+    get_date_ranges_to_fetch, so a table that is a few days behind doesn't
+    report its loaded days before the window as missing.
     """
+    today = datetime.now().date()
+    window_end = end_date or today
     
     try:
-        results = client.query(query)
-        existing_dates = {row.date for row in results}
+        partition_dates = get_partition_dates()
+        latest_date = max(partition_dates, default=today)
+        window_start = latest_date - timedelta(days=last_n_days - 1)
+        if start_date:
+            window_start = max(window_start, start_date)
+        
+        existing_dates = frozenset(d for d in partition_dates if window_start <= d <= window_end)
         print(f"Found {len(existing_dates)} recent dates in BigQuery (last {last_n_days} days)")
         if existing_dates:
             min_date = min(existing_dates)
@@ -133,20 +428,12 @@ def get_existing_dates(last_n_days=10) -> Set[datetime.date]:
         return existing_dates
     except Exception as e:
         print(f"Error querying existing dates (table might not exist): {e}")
-        return set()
+        return frozenset()
 
 def get_existing_dates_in_range(start_date: datetime.date, end_date: datetime.date) -> Set[datetime.date]:
     """Get all existing dates in a specific date range"""
-    query = f"""
-    SELECT DISTINCT date
-    FROM `{dataset_id}.{table_id}`
-    WHERE date >= '{start_date}' AND date <= '{end_date}'
-    ORDER BY date
-    """
-    
     try:
-        results = client.query(query)
-        existing_dates = {row.date for row in results}
+        existing_dates = {d for d in get_partition_dates() if start_date <= d <= end_date}
         total_possible_days = (end_date - start_date).days + 1
         print(f"Found {len(existing_dates)} existing dates in range {start_date} to {end_date}")
         print(f"Coverage: {len(existing_dates)}/{total_possible_days} days ({len(existing_dates)/total_possible_days*100:.1f}%)")
@@ -163,23 +450,75 @@ def get_existing_dates_in_range(start_date: datetime.date, end_date: datetime.da
         print(f"Error querying existing dates in range (table might not exist): {e}")
         return set()
 
+# Default for planner arguments that are looked up in BigQuery unless the caller already did
+not_looked_up = object()
+
 def get_latest_date_in_bq() -> datetime.date:
     """Get the most recent date in BigQuery table"""
-    query = f"""
-    SELECT MAX(date) as max_date
-    FROM `{dataset_id}.{table_id}`
-    """
-    
     try:
-        results = client.query(query)
-        for row in results:
-            if row.max_date:
-                return row.max_date
-        return None
+        return max(get_partition_dates(), default=None)
     except Exception as e:
         print(f"Error getting latest date: {e}")
         return None
 
+def group_consecutive_days(day_ordinals) -> List[tuple]:
+    """Group day ordinals into (start_date, end_date) ranges of consecutive days"""
+    ordinals = sorted(day_ordinals)
+    if not ordinals:
+        return []
+    
+    # A new range starts wherever an ordinal doesn't follow the previous one
+    breaks = [i for i in range(1, len(ordinals)) if ordinals[i] != ordinals[i - 1] + 1]
+    starts = [0] + breaks
+    ends = [i - 1 for i in breaks] + [len(ordinals) - 1]
+    
+    return [(date.fromordinal(ordinals[s]), date.fromordinal(ordinals[e])) for s, e in zip(starts, ends)]
+
+def find_missing_ranges(start_date: datetime.date, end_date: datetime.date,
+                        existing_dates: Set[datetime.date]) -> List[tuple]:
+    """
+    Find the (start_date, end_date) ranges of days between start and end that are not in existing_dates
+
+    Walks the sorted existing days once and emits the gaps between them, so
+    the work is O(existing days) rather than one step per day of the range.
+    """
+    start_ord = start_date.toordinal()
+    end_ord = end_date.toordinal()
+    existing_ordinals = sorted(o for o in map(date.toordinal, existing_dates) if start_ord <= o <= end_ord)
+    
+    ranges = []
+    next_missing = start_ord
+    for ordinal in existing_ordinals:
+        if ordinal > next_missing:
+            ranges.append((date.fromordinal(next_missing), date.fromordinal(ordinal - 1)))
+        next_missing = ordinal + 1
+    if next_missing <= end_ord:
+        ranges.append((date.fromordinal(next_missing), end_date))
+    
+    return ranges
+
+def split_date_range(start_date: datetime.date, end_date: datetime.date,
+                     max_days: int = ETLConfig.MAX_CHUNK_DAYS) -> List[tuple]:
+    """Split an inclusive date range into (start, end) chunks of at most max_days days"""
+    end_ordinal = end_date.toordinal()
+    return [(date.fromordinal(chunk_start), date.fromordinal(min(chunk_start + max_days - 1, end_ordinal)))
+            for chunk_start in range(start_date.toordinal(), end_ordinal + 1, max_days)]
+
+def coalesce_date_ranges(date_ranges: List[tuple], max_gap_days: int = ETLConfig.COALESCE_GAP_DAYS) -> List[tuple]:
+    """
+    Merge date ranges separated by at most max_gap_days days into one range
+    
+    The days inside merged gaps are fetched again, which trades a few
+    re-fetched days for fewer Facebook reports when the gaps are sparse.
+    """
+    merged = []
+    for range_start, range_end in sorted(date_ranges):
+        if merged and range_start.toordinal() - merged[-1][1].toordinal() - 1 <= max_gap_days:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+        else:
+            merged.append((range_start, range_end))
+    return merged
+
 def get_missing_date_ranges_for_backfill(start_date: datetime.date, end_date: datetime.date, 
                                        existing_dates: Set[datetime.date]) -> List[tuple]:
     """
@@ -188,44 +527,17 @@ def get_missing_date_ranges_for_backfill(start_date: datetime.date, end_date: da
     print(f"\n=== Backfill Date Range Analysis ===")
     print(f"Requested range: {start_date} to {end_date}")
     
-    # Generate all dates in the range
-    all_dates = set()
-    current = start_date
-    while current <= end_date:
-        all_dates.add(current)
-        current += timedelta(days=1)
-    
-    # Find missing dates
-    missing_dates = all_dates - existing_dates
+    # Derive the gaps from the existing days instead of stepping through every date
+    ranges = find_missing_ranges(start_date, end_date, existing_dates)
     
-    if not missing_dates:
+    if not ranges:
         print("✅ No missing dates found!")
         return []
     
-    # Convert to sorted list
-    missing_dates_sorted = sorted(missing_dates)
-    print(f"Found {len(missing_dates)} missing dates out of {len(all_dates)} total")
-    print(f"Missing date range: {missing_dates_sorted[0]} to {missing_dates_sorted[-1]}")
-    
-    # Group consecutive dates into ranges
-    ranges = []
-    if missing_dates_sorted:
-        range_start = missing_dates_sorted[0]
-        range_end = missing_dates_sorted[0]
-        
-        for i in range(1, len(missing_dates_sorted)):
-            current_date = missing_dates_sorted[i]
-            if current_date == range_end + timedelta(days=1):
-                # Consecutive date, extend current range
-                range_end = current_date
-            else:
-                # Gap found, save current range and start new one
-                ranges.append((range_start, range_end))
-                range_start = current_date
-                range_end = current_date
-        
-        # Add the last range
-        ranges.append((range_start, range_end))
+    total_days = (end_date - start_date).days + 1
+    missing_days = sum((end - start).days + 1 for start, end in ranges)
+    print(f"Found {missing_days} missing dates out of {total_days} total")
+    print(f"Missing date range: {ranges[0][0]} to {ranges[-1][1]}")
     
     print(f"Grouped into {len(ranges)} consecutive range(s):")
     for i, (start, end) in enumerate(ranges, 1):
@@ -237,7 +549,8 @@ def get_missing_date_ranges_for_backfill(start_date: datetime.date, end_date: da
 def get_date_ranges_to_fetch(start_date: datetime.date, end_date: datetime.date, 
                            existing_dates: Set[datetime.date], 
                            rewrite_last_n_days: int = 0,
-                           monitoring_window_days: int = 10) -> List[tuple]:
+                           monitoring_window_days: int = 10,
+                           latest_date_in_bq: Optional[datetime.date] = not_looked_up) -> List[tuple]:
     """
     Smart date range fetching focused on recent data integrity
     
@@ -246,108 +559,77 @@ def get_date_ranges_to_fetch(start_date: datetime.date, end_date: datetime.date,
     2. Focus on monitoring window (last N days from latest date)
     3. Rewrite latest date + fill any gaps in monitoring window
     4. If latest date is old, fill gap from latest to yesterday
+    
+    latest_date_in_bq is looked up when not given; None means the table has
+    no data (or the caller's lookup failed) and is not looked up again.
     """
     print(f"\n=== Smart Date Range Analysis ===")
     print(f"Requested range: {start_date} to {end_date}")
     print(f"Monitoring window: {monitoring_window_days} days")
     
     # Get the latest date from BigQuery
-    latest_date_in_bq = get_latest_date_in_bq()
-    yesterday = datetime.now().date() - timedelta(days=1)
+    if latest_date_in_bq is not_looked_up:
+        latest_date_in_bq = get_latest_date_in_bq()
     
     if not latest_date_in_bq:
         print("No existing data found - will fetch entire requested range")
         return [(start_date, end_date)]
     
-    # Calculate monitoring window
-    monitoring_start = latest_date_in_bq - timedelta(days=monitoring_window_days - 1)
+    # Do all range arithmetic on integer day ordinals
+    start_ord = start_date.toordinal()
+    end_ord = end_date.toordinal()
+    latest_ord = latest_date_in_bq.toordinal()
+    yesterday_ord = date.today().toordinal() - 1
+    monitoring_start_ord = latest_ord - (monitoring_window_days - 1)
+    existing_ordinals = set(map(date.toordinal, existing_dates))
     
     print(f"Latest date in BQ: {latest_date_in_bq}")
-    print(f"Yesterday: {yesterday}")
-    print(f"Monitoring window: {monitoring_start} to {latest_date_in_bq}")
+    print(f"Yesterday: {date.fromordinal(yesterday_ord)}")
+    print(f"Monitoring window: {date.fromordinal(monitoring_start_ord)} to {latest_date_in_bq}")
     
     # Determine what we need to fetch
-    dates_to_fetch = set()
+    ordinals_to_fetch = set()
     
     # Always rewrite the latest date for completeness
-    if rewrite_last_n_days > 0 and latest_date_in_bq:
-        rewrite_from = max(
-            latest_date_in_bq - timedelta(days=rewrite_last_n_days - 1),
-            start_date
-        )
-        rewrite_to = min(latest_date_in_bq, end_date)
+    if rewrite_last_n_days > 0:
+        rewrite_from = max(latest_ord - rewrite_last_n_days + 1, start_ord)
+        rewrite_to = min(latest_ord, end_ord)
         
-        print(f"Will rewrite last {rewrite_last_n_days} day(s): {rewrite_from} to {rewrite_to}")
+        print(f"Will rewrite last {rewrite_last_n_days} day(s): "
+              f"{date.fromordinal(rewrite_from)} to {date.fromordinal(rewrite_to)}")
         
-        current = rewrite_from
-        while current <= rewrite_to:
-            dates_to_fetch.add(current)
-            current += timedelta(days=1)
+        ordinals_to_fetch.update(range(rewrite_from, rewrite_to + 1))
     
     # Check for gaps in monitoring window
-    current = max(monitoring_start, start_date)
-    monitoring_end = min(latest_date_in_bq, end_date)
-    
-    gaps_in_monitoring = []
-    while current <= monitoring_end:
-        if current not in existing_dates:
-            gaps_in_monitoring.append(current)
-            dates_to_fetch.add(current)
-        current += timedelta(days=1)
+    monitoring_ordinals = range(max(monitoring_start_ord, start_ord), min(latest_ord, end_ord) + 1)
+    gaps_in_monitoring = set(monitoring_ordinals) - existing_ordinals
+    ordinals_to_fetch |= gaps_in_monitoring
     
     if gaps_in_monitoring:
-        print(f"Found {len(gaps_in_monitoring)} gaps in monitoring window: {gaps_in_monitoring}")
+        gap_dates = [date.fromordinal(o) for o in sorted(gaps_in_monitoring)]
+        print(f"Found {len(gap_dates)} gaps in monitoring window: {gap_dates}")
     
     # Add missing dates from latest_date + 1 to yesterday
-    if latest_date_in_bq < yesterday:
-        gap_start = latest_date_in_bq + timedelta(days=1)
-        gap_end = min(yesterday, end_date)
+    if latest_ord < yesterday_ord:
+        gap_end = min(yesterday_ord, end_ord)
         
-        print(f"Gap from latest to yesterday: {gap_start} to {gap_end}")
+        print(f"Gap from latest to yesterday: {date.fromordinal(latest_ord + 1)} to {date.fromordinal(gap_end)}")
         
-        current = gap_start
-        while current <= gap_end:
-            dates_to_fetch.add(current)
-            current += timedelta(days=1)
+        ordinals_to_fetch.update(range(latest_ord + 1, gap_end + 1))
     
     # Also include any requested dates beyond our latest date
-    if end_date > latest_date_in_bq:
-        future_start = max(latest_date_in_bq + timedelta(days=1), start_date)
-        future_end = end_date
-        
-        current = future_start
-        while current <= future_end:
-            dates_to_fetch.add(current)
-            current += timedelta(days=1)
+    if end_ord > latest_ord:
+        ordinals_to_fetch.update(range(max(latest_ord + 1, start_ord), end_ord + 1))
     
-    if not dates_to_fetch:
+    if not ordinals_to_fetch:
         print("No missing dates found!")
         return []
     
-    # Convert to sorted list and group into consecutive ranges
-    dates_sorted = sorted(dates_to_fetch)
-    print(f"Total dates to fetch: {len(dates_sorted)}")
-    print(f"Date range: {dates_sorted[0]} to {dates_sorted[-1]}")
+    print(f"Total dates to fetch: {len(ordinals_to_fetch)}")
+    print(f"Date range: {date.fromordinal(min(ordinals_to_fetch))} to {date.fromordinal(max(ordinals_to_fetch))}")
     
     # Group consecutive dates into ranges
-    ranges = []
-    if dates_sorted:
-        range_start = dates_sorted[0]
-        range_end = dates_sorted[0]
-        
-        for i in range(1, len(dates_sorted)):
-            current_date = dates_sorted[i]
-            if current_date == range_end + timedelta(days=1):
-                # Consecutive date, extend current range
-                range_end = current_date
-            else:
-                # Gap found, save current range and start new one
-                ranges.append((range_start, range_end))
-                range_start = current_date
-                range_end = current_date
-        
-        # Add the last range
-        ranges.append((range_start, range_end))
+    ranges = group_consecutive_days(ordinals_to_fetch)
     
     print(f"Optimized into {len(ranges)} range(s):")
     for i, (start, end) in enumerate(ranges, 1):
@@ -359,214 +641,699 @@ def get_date_ranges_to_fetch(start_date: datetime.date, end_date: datetime.date,
 def delete_existing_data_for_date_range(start_date: datetime.date, end_date: datetime.date):
     """Delete existing data for a date range to avoid duplicates"""
     
-    # First check if there's any data in the date range
-    check_query = f"""
-    SELECT COUNT(*) as row_count
-    FROM `{dataset_id}.{table_id}`
-    WHERE date >= '{start_date}' AND date <= '{end_date}'
+    # A single DELETE reports how many rows it removed, so no COUNT job is needed first
+    delete_query = f"""
+    DELETE FROM `{dataset_id}.{table_id}`
+    WHERE date BETWEEN @start_date AND @end_date
     """
+    job_config = bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ScalarQueryParameter('start_date', 'DATE', start_date),
+        bigquery.ScalarQueryParameter('end_date', 'DATE', end_date),
+    ])
     
     try:
-        # Check if there are any rows to delete
-        check_job = client.query(check_query)
-        result = check_job.result()
-        row_count = next(iter(result)).row_count
+        job = bq_client().query(delete_query, job_config=job_config)
+        job.result()
+        invalidate_partition_dates()
         
-        if row_count == 0:
-            print(f"No existing data found for {start_date} to {end_date}, skipping deletion")
+        if not job.num_dml_affected_rows:
+            print(f"No existing data found for {start_date} to {end_date}, nothing deleted")
             return
         
-        print(f"Found {row_count} existing rows for {start_date} to {end_date}, deleting...")
+        print(f"Deleted {job.num_dml_affected_rows} existing rows for {start_date} to {end_date}")
         
-        # Delete existing data
-        delete_query = f"""
-        DELETE FROM `{dataset_id}.{table_id}`
-        WHERE date >= '{start_date}' AND date <= '{end_date}'
-        """
-        
-        job = client.query(delete_query)
+    except Exception as e:
+        print(f"Error deleting existing data: {e}")
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether BigQuery rejected a request with rateLimitExceeded, which is safe to retry"""
+    return (isinstance(error, (gcp_exceptions.Forbidden, gcp_exceptions.TooManyRequests))
+            and any(reason.get('reason') == 'rateLimitExceeded' for reason in error.errors))
+
+def bq_rate_limit_retry(description: str) -> Retry:
+    """
+    Retry policy for BigQuery requests rejected by a rate limit, such as the per-table update limit
+
+    Backs off exponentially with jitter, from 1 up to 16 seconds between
+    attempts, for BQ_RATE_LIMIT_RETRY_TIMEOUT seconds in total.
+    """
+    return Retry(predicate=is_rate_limit_error, initial=1.0, maximum=16.0, multiplier=2.0,
+                 timeout=ETLConfig.BQ_RATE_LIMIT_RETRY_TIMEOUT,
+                 on_error=lambda error: print(f"⚠️  Rate limited {description}, retrying..."))
+
+def load_parquet_file(parquet_buffer, target_table_id: str, write_disposition):
+    """Load a Parquet buffer into a table of the dataset and wait for the job"""
+    table_ref = table_reference(target_table_id)
+    job_config = load_job_config(write_disposition)
+
+    # With a known size, files under 5 MB (the usual daily delta) go up in one
+    # multipart request instead of a resumable upload session
+    start = parquet_buffer.tell()
+    size = parquet_buffer.seek(0, os.SEEK_END) - start
+    parquet_buffer.seek(start)
+
+    job = bq_client().load_table_from_file(parquet_buffer, table_ref, job_config=job_config, size=size)
+    try:
+        job.result()  # Wait for the job to complete
+    finally:
+        if target_table_id.split('$')[0] == table_id:
+            invalidate_partition_dates()
+    return job
+
+def create_staging_table() -> str:
+    """
+    Create an empty staging table with the main schema and return its ID.
+    
+    The table expires on its own after STAGING_TABLE_EXPIRATION_HOURS, so a
+    run killed before it can drop the table leaves nothing behind.
+    """
+    stage_table_id = f"{table_id}_stg_{uuid.uuid4().hex}"
+    table = bigquery.Table(table_reference(stage_table_id), schema=schema)
+    table.expires = datetime.now(timezone.utc) + timedelta(hours=ETLConfig.STAGING_TABLE_EXPIRATION_HOURS)
+    bq_client().create_table(table)
+    return stage_table_id
+
+def merge_staged_dates(stage_table_id: str, dates: List[datetime.date]):
+    """
+    Replace the given dates of the main table with the rows of a staging table.
+    
+    Existing rows on those dates are deleted and the staged rows inserted by
+    one atomic MERGE, so re-running a range never leaves duplicates behind
+    and the date predicate keeps the target scan to the touched partitions.
+    """
+    merge_query = f"""
+    MERGE `{dataset_id}.{table_id}` T
+    USING `{dataset_id}.{stage_table_id}` S
+    ON FALSE
+    WHEN NOT MATCHED BY SOURCE AND T.date IN UNNEST(@dates) THEN
+        DELETE
+    WHEN NOT MATCHED THEN
+        INSERT ROW
+    """
+    job_config = bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ArrayQueryParameter('dates', 'DATE', dates),
+    ])
+    
+    job = bq_client().query(merge_query, job_config=job_config)
+    try:
         job.result()
-        print(f"Deleted existing data for {start_date} to {end_date}")
+    finally:
+        invalidate_partition_dates()
+    return job
+
+def replace_partition(day: datetime.date, partition_file=None):
+    """
+    Replace one day partition of the main table with the rows of a Parquet file.
+    
+    Loading into the table$YYYYMMDD decorator with WRITE_TRUNCATE swaps the
+    partition atomically without any DML, and a day without a file has its
+    partition deleted, which is metadata-only as well.
+    """
+    partition_id = f"{table_id}${day.strftime('%Y%m%d')}"
+    
+    def write_partition():
+        if partition_file is None:
+            bq_client().delete_table(table_reference(partition_id), not_found_ok=True)
+            invalidate_partition_dates()
+            return
+        partition_file.seek(0)
+        load_parquet_file(partition_file, partition_id, bigquery.WriteDisposition.WRITE_TRUNCATE)
+    
+    # Concurrent partition writes can trip BigQuery's per-table update rate limit, which is safe to retry
+    bq_rate_limit_retry(f"replacing {partition_id}")(write_partition)()
+
+def split_partition_files(parquet_file, stack: ExitStack) -> Dict[datetime.date, tuple]:
+    """
+    Split a Parquet file into one temporary Parquet file per day.
+    
+    The file is read one row group at a time, so only a single page of rows
+    is held in memory. Returns {day: (file, row count)} for the days that have
+    rows; the files are closed along with the given ExitStack.
+    """
+    partition_files = {}
+    writers = {}
+    source = pq.ParquetFile(parquet_file)
+    
+    try:
+        for index in range(source.num_row_groups):
+            row_group = source.read_row_group(index)
+            for day in pc.unique(row_group['date']).to_pylist():
+                if day is None:
+                    continue
+                if day not in writers:
+                    partition_files[day] = [stack.enter_context(tempfile.TemporaryFile()), 0]
+                    writers[day] = pq.ParquetWriter(partition_files[day][0], arrow_schema,
+                                                    compression=ETLConfig.PARQUET_COMPRESSION)
+                day_rows = row_group.filter(pc.equal(row_group['date'], day))
+                writers[day].write_table(day_rows)
+                partition_files[day][1] += day_rows.num_rows
+    finally:
+        for writer in writers.values():
+            writer.close()
+    
+    return {day: tuple(entry) for day, entry in partition_files.items()}
+
+def format_date_ranges(dates) -> str:
+    """Describe dates as comma-separated ranges of consecutive days"""
+    return ', '.join(str(start) if start == end else f"{start} to {end}"
+                     for start, end in group_consecutive_days(map(date.toordinal, dates)))
+
+def replace_partitions(parquet_file, dates: List[datetime.date]):
+    """
+    Replace the day partitions of the given dates with the matching rows of a Parquet file.
+    
+    Each day is swapped on its own, so a failure leaves the other days
+    replaced; the dates that were and weren't replaced are reported and the
+    error is raised so the failed days can be re-run.
+    """
+    with ExitStack() as stack:
+        partition_files = split_partition_files(parquet_file, stack)
         
-    except Exception as e:
-        print(f"Error checking/deleting existing data: {e}")
+        with ThreadPoolExecutor(max_workers=min(ETLConfig.MAX_CONCURRENT_REQUESTS, len(dates))) as executor:
+            futures = {day: executor.submit(replace_partition, day, partition_files.get(day, (None,))[0])
+                       for day in dates}
+        errors = {day: future.exception() for day, future in futures.items() if future.exception()}
+    
+    replaced_dates = [day for day in dates if day not in errors]
+    rows = sum(partition_files[day][1] for day in replaced_dates if day in partition_files)
+    
+    if not errors:
+        print(f"✅ Replaced {len(dates)} day partition(s) of {dataset_id}:{table_id} with {rows} rows")
+        return
+    
+    for day, error in errors.items():
+        print(f"❌ Could not replace partition {day}: {error}")
+    if replaced_dates:
+        print(f"⚠️  Replaced {len(replaced_dates)} day partition(s) with {rows} rows: {format_date_ranges(replaced_dates)}")
+    raise RuntimeError(f"{len(errors)} of {len(dates)} day partition(s) were not replaced and still hold "
+                       f"their previous data: {format_date_ranges(errors)}")
 
-def get_action_value(actions_data, action_type):
+def load_chunks(parquet_file, chunks: List[tuple], rows_to_load: int, delete_existing: bool):
     """
-    Extract action value for specific action type from actions list
+    Load the Parquet file holding every fetched chunk into BigQuery.
+    
+    When delete_existing is set the chunks' dates are replaced. Up to
+    MAX_PARTITION_LOADS days are swapped one partition at a time; larger
+    sets are staged and swapped in by a single MERGE, or just cleared when
+    no chunk returned rows. Otherwise the rows are appended with one load job.
     """
-    if not actions_data or not isinstance(actions_data, list):
-        return 0
+    day_ordinals = {ordinal for chunk_start, chunk_end in chunks
+                    for ordinal in range(chunk_start.toordinal(), chunk_end.toordinal() + 1)}
+    dates = [date.fromordinal(ordinal) for ordinal in sorted(day_ordinals)]
     
-    for action in actions_data:
-        if isinstance(action, dict) and action.get('action_type') == action_type:
-            try:
-                return int(action.get('value', 0))
-            except (ValueError, TypeError):
-                return 0
-    return 0
+    if delete_existing and len(dates) <= ETLConfig.MAX_PARTITION_LOADS:
+        replace_partitions(parquet_file, dates)
+        return
+    
+    if not rows_to_load:
+        print("⚠️  No active campaigns/ads found in any chunk, skipping BigQuery load")
+        if delete_existing:
+            for range_start, range_end in group_consecutive_days(day_ordinals):
+                delete_existing_data_for_date_range(range_start, range_end)
+        return
+    
+    if delete_existing:
+        # Stage all chunks, then swap them into the main table with a single MERGE
+        stage_table_id = create_staging_table()
+        try:
+            load_parquet_file(parquet_file, stage_table_id, bigquery.WriteDisposition.WRITE_TRUNCATE)
+            job = merge_staged_dates(stage_table_id, dates)
+            print(f"✅ Merged {rows_to_load} rows for {len(dates)} day(s) into {dataset_id}:{table_id} "
+                  f"({job.num_dml_affected_rows} rows affected)")
+        finally:
+            bq_client().delete_table(table_reference(stage_table_id), not_found_ok=True)
+    else:
+        job = load_parquet_file(parquet_file, table_id, bigquery.WriteDisposition.WRITE_APPEND)
+        if job.errors:
+            print(f"Errors occurred: {job.errors}")
+        else:
+            print(f"✅ Loaded {job.output_rows} rows into {dataset_id}:{table_id}")
 
-def get_action_cost_value(action_values_data, action_type):
+def index_actions(actions_data) -> dict:
     """
-    Extract cost per action value for specific action type
+    Index an actions/action_values list by action type for constant-time lookups
     """
-    if not action_values_data or not isinstance(action_values_data, list):
+    if not actions_data or not isinstance(actions_data, list):
+        return {}
+    
+    return {action.get('action_type'): action.get('value')
+            for action in actions_data if isinstance(action, dict)}
+
+def parse_count(value) -> int:
+    """Parse an action count, treating malformed values as 0"""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return 0
+
+def parse_cost(value) -> float:
+    """Parse a cost per action, treating malformed values as 0.0"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
         return 0.0
+
+def compile_insight_extractor():
+    """
+    Generate a straight-line function turning one insight into a schema-ordered tuple.
     
-    for cost in action_values_data:
-        if isinstance(cost, dict) and cost.get('action_type') == action_type:
-            try:
-                return float(cost.get('value', 0))
-            except (ValueError, TypeError):
-                return 0.0
-    return 0.0
+    The source is built once from the schema, with one expression per
+    column, so the per-insight hot path has no loops over field mappings
+    or priority actions. Action counts and costs are left as the raw API
+    values; build_arrow_table parses them a whole column at a time.
+    """
+    values = {name: f"get({api_field!r})" for name, api_field in api_field_columns.items()}
+    lines = [
+        "def extract_insight(insight):",
+        "    get = insight.get",
+        "    action_counts = index_actions(get('actions'))",
+        # Costs only matter for actions that happened, so skip them for rows without any
+        "    action_costs = index_actions(get('action_values')) if action_counts else {}",
+    ]
+    
+    for action_type, count_field, cost_field in action_columns:
+        values[count_field] = f"action_counts.get({action_type!r})"
+        values[cost_field] = f"action_costs.get({action_type!r})"
+    
+    lines.append(f"    return ({', '.join(values[field.name] for field in schema)},)")
+    
+    namespace = {'index_actions': index_actions}
+    exec(compile("\n".join(lines), '<extract_insight>', 'exec'), namespace)
+    return namespace['extract_insight']
 
-def fetch_and_load_data(start_date: datetime.date, end_date: datetime.date, delete_existing: bool = True):
-    """Fetch data from Facebook API and load to BigQuery"""
+extract_insight = compile_insight_extractor()
+
+def write_insights_parquet(insights, writer) -> tuple:
+    """
+    Transform insights into Parquet row groups, one REPORT_PAGE_SIZE page at a time.
     
-    # Check request size - if more than 30 days, split into chunks
-    days_diff = (end_date - start_date).days + 1
-    if days_diff > 30:
-        print(f"⚠️  Request for {days_diff} days is too large, splitting into chunks...")
+    Only a single page of rows is held in memory, so memory stays flat
+    however many rows the report returns. Returns the number of rows read
+    from the API and the number written after the spend filter.
+    """
+    total_rows = 0
+    rows_written = 0
+    rows = []
+    
+    # Hoisted out of the per-row loop to avoid repeated attribute lookups
+    page_size = ETLConfig.REPORT_PAGE_SIZE
+    append_row = rows.append
+    
+    for insight in insights:
+        append_row(extract_insight(insight))
         
-        current_start = start_date
-        while current_start <= end_date:
-            chunk_end = min(current_start + timedelta(days=29), end_date)
-            print(f"📅 Processing chunk: {current_start} to {chunk_end}")
-            fetch_and_load_data(current_start, chunk_end, delete_existing)
-            current_start = chunk_end + timedelta(days=1)
-            
-            # Pause between requests
-            if current_start <= end_date:
-                print(f"⏳ Waiting {ETLConfig.RATE_LIMIT_DELAY} seconds between requests...")
-                time.sleep(ETLConfig.RATE_LIMIT_DELAY)
-        return
+        if len(rows) == page_size:
+            total_rows += page_size
+            rows_written += write_page(writer, rows)
+            rows.clear()
+    
+    if rows:
+        total_rows += len(rows)
+        rows_written += write_page(writer, rows)
+    
+    return total_rows, rows_written
+
+def write_page(writer, rows: List[tuple]) -> int:
+    """Write one page of rows as a row group, returning the rows kept by the spend filter"""
+    columns = {field.name: values for field, values in zip(schema, zip(*rows))}
+    page = build_arrow_table(columns)
+    
+    # Filter out rows with spend below threshold in one pass over the spend column
+    page = page.filter(pc.greater_equal(page['spend'], ETLConfig.MIN_SPEND_THRESHOLD))
+    if page.num_rows:
+        writer.write_table(page)
+    return page.num_rows
+
+def append_parquet_file(parquet_file, writer, writer_lock):
+    """Copy every row group of a Parquet file into a writer shared between threads"""
+    source = pq.ParquetFile(parquet_file)
+    for index in range(source.num_row_groups):
+        row_group = source.read_row_group(index)
+        with writer_lock:
+            writer.write_table(row_group)
+
+# Count and cost columns filled from the actions/action_values lists
+action_fields = {field for _, count_field, cost_field in action_columns for field in (count_field, cost_field)}
+
+# Strings that int() and float() accept for well-formed Facebook action values
+count_pattern = r'^\s*[+-]?\d+\s*$'
+cost_pattern = r'^\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\s*$'
+
+def parse_action_column(values, arrow_type, pattern: str, parse) -> pa.Array:
+    """
+    Parse a column of raw action values, treating missing and malformed values as 0
+
+    Values matching pattern (plain ASCII numbers) are cast by Arrow in one
+    pass. The few that don't, such as '', 'abc', 'nan' or Unicode digits,
+    go through parse itself, so every value parses exactly as
+    parse_count/parse_cost would. Columns that aren't all strings fall back
+    to parsing value by value.
+    """
+    try:
+        array = pa.array(values, type=pa.string())
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([parse(value) for value in values], type=arrow_type)
+    
+    valid = pc.match_substring_regex(array, pattern)
+    # Arrow's cast takes neither surrounding whitespace nor a leading '+', unlike int()/float()
+    cleaned = pc.replace_substring_regex(array, r'^\s*\+?|\s*$', '')
+    parsed = pc.if_else(valid, cleaned, pa.scalar(None, pa.string())).cast(arrow_type)
+    
+    unmatched = pc.fill_null(pc.invert(valid), False)
+    if pc.any(unmatched).as_py():
+        leftovers = [parse(value) for value in array.filter(unmatched).to_pylist()]
+        parsed = pc.replace_with_mask(parsed, unmatched, pa.array(leftovers, type=arrow_type))
+    return parsed.fill_null(0)
+
+def build_arrow_table(columns: dict) -> pa.Table:
+    """
+    Build an Arrow table from per-column lists, casting raw API values one column at a time
+    """
+    arrays = {}
+    for field in arrow_schema:
+        values = columns[field.name]
+        if field.name in action_fields:
+            continue
+        if field.name in api_raw_columns:
+            array = pa.array(values).cast(field.type)
+            if field.name != 'date':
+                array = array.fill_null(0)
+        else:
+            array = pa.array(values, type=field.type)
+        arrays[field.name] = array
+    
+    # Fallback: calculate cost per action from spend when Facebook sent no cost
+    spend = arrays['spend']
+    for _, count_field, cost_field in action_columns:
+        counts = parse_action_column(columns[count_field], pa.int64(), count_pattern, parse_count)
+        costs = parse_action_column(columns[cost_field], pa.float64(), cost_pattern, parse_cost)
+        # Cost per action only counts when the action happened
+        costs = pc.if_else(pc.greater(counts, 0), costs, 0.0)
+        arrays[count_field] = counts
+        missing_cost = pc.and_(pc.greater(counts, 0), pc.equal(costs, 0.0))
+        arrays[cost_field] = pc.if_else(missing_cost, pc.divide(spend, pc.cast(counts, pa.float64())), costs)
     
-    params = {
-        'time_range': {'since': start_date.strftime('%Y-%m-%d'), 'until': end_date.strftime('%Y-%m-%d')},
+    return pa.Table.from_arrays([arrays[field.name] for field in arrow_schema], schema=arrow_schema)
+
+def build_insights_params(start_date: datetime.date, end_date: datetime.date) -> dict:
+    """Build the insights request parameters for a date range"""
+    return {
+        'time_range': {'since': start_date.isoformat(), 'until': end_date.isoformat()},
         'level': 'ad',
         'time_increment': 1,  # Daily breakdown
     }
 
+# Report run fields read while waiting for a report, and the statuses that end the wait
+report_status_fields = [AdReportRun.Field.async_status, AdReportRun.Field.async_percent_completion]
+finished_report_statuses = ('Job Completed', 'Job Failed', 'Job Skipped')
+
+def start_insights_reports(chunks: List[tuple]) -> dict:
+    """
+    Start async insights reports for many chunks through Graph API batch requests.
+    
+    Up to FB_BATCH_SIZE report runs are created per HTTP round-trip. Chunks
+    whose report could not be started are left out of the result and start
+    their own report when fetched.
+    """
+    api = fb_api()
+    report_runs = {}
+    
+    for batch_start in range(0, len(chunks), ETLConfig.FB_BATCH_SIZE):
+        batch = api.new_batch()
+        for chunk in chunks[batch_start:batch_start + ETLConfig.FB_BATCH_SIZE]:
+            # The account's use case usage comes back in each inner response's headers
+            def on_success(response, chunk=chunk):
+                record_api_usage(response.headers())
+                report_runs[chunk] = AdReportRun(response.json()['report_run_id'])
+            
+            def on_failure(response, chunk=chunk):
+                record_api_usage(response.headers())
+                print(f"⚠️  Could not start report for {chunk[0]} to {chunk[1]}: "
+                      f"{response.error().api_error_message()}")
+            
+            fb_account().get_insights_async(fields=fields, params=build_insights_params(*chunk),
+                                       batch=batch, success=on_success, failure=on_failure)
+        
+        wait_for_api_budget()
+        try:
+            batch.execute()
+        except Exception as e:
+            print(f"⚠️  Batch request failed, chunks will start their own reports: {e}")
+    
+    print(f"🚀 Started {len(report_runs)}/{len(chunks)} insights reports in batch requests")
+    return report_runs
+
+def poll_insights_reports(report_runs: dict):
+    """
+    Yield (chunk, report_run) pairs as their async reports finish.
+    
+    The status of every pending report is checked together, FB_BATCH_SIZE
+    reports per Graph API batch request, instead of each worker polling its
+    own report. Reports still running at REPORT_TIMEOUT, and those Facebook
+    failed, are yielded too so get_insights_report can retry or give up on
+    them one by one.
+    """
+    api = fb_api()
+    pending = dict(report_runs)
+    deadline = time.time() + ETLConfig.REPORT_TIMEOUT
+    delay = ETLConfig.REPORT_POLL_DELAY
+    
+    while pending:
+        chunks = list(pending)
+        for batch_start in range(0, len(chunks), ETLConfig.FB_BATCH_SIZE):
+            batch = api.new_batch()
+            for chunk in chunks[batch_start:batch_start + ETLConfig.FB_BATCH_SIZE]:
+                def on_success(response, report_run=pending[chunk]):
+                    record_api_usage(response.headers())
+                    status = response.json()
+                    for field in report_status_fields:
+                        if field in status:
+                            report_run[field] = status[field]
+                
+                def on_failure(response):
+                    record_api_usage(response.headers())
+                
+                pending[chunk].api_get(fields=report_status_fields, batch=batch,
+                                       success=on_success, failure=on_failure)
+            
+            wait_for_api_budget()
+            try:
+                batch.execute()
+            except Exception as e:
+                print(f"⚠️  Batch status check failed, reports will be polled one by one: {e}")
+                deadline = 0
+                break
+        
+        for chunk in chunks:
+            if pending[chunk].get(AdReportRun.Field.async_status) in finished_report_statuses:
+                yield chunk, pending.pop(chunk)
+        
+        if pending and time.time() + delay > deadline:
+            yield from pending.items()
+            return
+        if pending:
+            print(f"⏳ {len(pending)} report(s) still running, checking again in {delay} seconds...")
+            time.sleep(delay)
+            delay = min(delay * 2, ETLConfig.REPORT_POLL_MAX_DELAY)
+
+def iter_report_rows(report_run: AdReportRun):
+    """
+    Yield the raw JSON rows of a completed report, page by page.
+    
+    Pages are read with plain Graph API calls instead of an SDK Cursor, so
+    no AdsInsights object is built per row - the transform only needs
+    dict.get on the decoded JSON. Every page request checks the API budget
+    first, and a rate limit error backs off and retries the same cursor
+    instead of failing the chunk.
+    """
+    api = fb_api()
+    params = {'limit': ETLConfig.REPORT_PAGE_SIZE}
+    
+    while True:
+        for attempt in range(1, ETLConfig.REPORT_MAX_RETRIES + 1):
+            wait_for_api_budget()
+            try:
+                response = api.call('GET', (report_run['id'], 'insights'), params=params).json()
+                break
+            except FacebookRequestError as e:
+                if e.api_error_code() not in rate_limit_error_codes or attempt == ETLConfig.REPORT_MAX_RETRIES:
+                    raise
+                print(f"⚠️  Rate limited by Facebook while paging ({e.api_error_message()}), "
+                      f"backing off before retrying...")
+                wait_for_api_budget(throttled=True)
+        yield from response.get('data', [])
+        
+        paging = response.get('paging', {})
+        if 'next' not in paging:
+            return
+        params['after'] = paging['cursors']['after']
+
+def get_insights_report(params: dict, report_run: AdReportRun = None):
+    """
+    Run an async insights report and return an iterator over its raw rows.
+    
+    Polls the AdReportRun (a new one, unless an already started report_run
+    is given) with exponential backoff until Facebook marks the job
+    completed, retrying the whole report when the job fails or Facebook
+    asks us to (error subcode 2446079). Rate limit errors back off and
+    then resume the same report. Polls only request the status fields,
+    not the whole report run.
+    """
+
+    for attempt in range(1, ETLConfig.REPORT_MAX_RETRIES + 1):
+        try:
+            if report_run is None:
+                report_run = fb_account().get_insights_async(fields=fields, params=params)
+            deadline = time.time() + ETLConfig.REPORT_TIMEOUT
+            delay = ETLConfig.REPORT_POLL_DELAY
+            
+            while True:
+                # Reports that poll_insights_reports already saw finish need no extra poll
+                if report_run.get(AdReportRun.Field.async_status) not in finished_report_statuses:
+                    report_run.api_get(fields=report_status_fields)
+                status = report_run[AdReportRun.Field.async_status]
+                if status in finished_report_statuses:
+                    break
+                if time.time() + delay > deadline:
+                    raise TimeoutError(f"Insights report {report_run['id']} not completed "
+                                       f"after {ETLConfig.REPORT_TIMEOUT} seconds")
+                
+                print(f"⏳ Report {status} ({report_run[AdReportRun.Field.async_percent_completion]}%), "
+                      f"checking again in {delay} seconds...")
+                time.sleep(delay)
+                delay = min(delay * 2, ETLConfig.REPORT_POLL_MAX_DELAY)
+            
+            if status == 'Job Completed':
+                return iter_report_rows(report_run)
+            if attempt == ETLConfig.REPORT_MAX_RETRIES:
+                raise RuntimeError(f"Insights report {report_run['id']} ended with status '{status}'")
+            print(f"⚠️  Report {report_run['id']} ended with status '{status}', starting it again...")
+            report_run = None
+        except FacebookRequestError as e:
+            if attempt == ETLConfig.REPORT_MAX_RETRIES:
+                raise
+            if e.api_error_code() in rate_limit_error_codes:
+                print(f"⚠️  Rate limited by Facebook ({e.api_error_message()}), backing off before retrying...")
+                wait_for_api_budget(throttled=True)
+                continue
+            if e.api_error_subcode() != 2446079:
+                raise
+            report_run = None
+            retry_delay = ETLConfig.REPORT_POLL_DELAY * 2 ** attempt
+            print(f"⚠️  Report failed ({e.api_error_message()}), retrying in {retry_delay} seconds...")
+            time.sleep(retry_delay)
+
+def fetch_chunk(start_date: datetime.date, end_date: datetime.date, writer, writer_lock,
+                report_run: AdReportRun = None):
+    """
+    Fetch one chunk from the Facebook API and append its rows to a shared Parquet writer.
+    
+    Returns the number of rows written, or None when the chunk could not be
+    fetched so that its dates are left untouched in BigQuery.
+    """
+    days_diff = (end_date - start_date).days + 1
+    params = build_insights_params(start_date, end_date)
+
     try:
         print(f"\n--- Fetching data ---")
         print(f"Date range: {start_date} to {end_date}")
         print(f"Ad account: {ad_account_id}")
         print(f"Days in request: {days_diff}")
         
-        # Delete existing data for this range to avoid duplicates
-        if delete_existing:
-            delete_existing_data_for_date_range(start_date, end_date)
-        
-        # Set 2 minute timeout for API request
-        print("🔄 Sending request to Facebook API...")
-        signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(120)  # 2 minute timeout
+        # Back off first if Facebook reported we are close to the rate limit
+        wait_for_api_budget()
         
+        print("🔄 Requesting insights report from Facebook API...")
         start_time = time.time()
         try:
-            insights = account.get_insights(fields=fields, params=params)
+            insights = get_insights_report(params, report_run)
             api_time = time.time() - start_time
-            print(f"✅ API responded in {api_time:.2f} seconds")
-        except APITimeoutError:
-            print("⏰ API request exceeded 2 minute timeout!")
+            print(f"✅ Report completed in {api_time:.2f} seconds")
+        except (requests.exceptions.Timeout, TimeoutError) as e:
+            print(f"⏰ Facebook API timed out: {e}")
             print("💡 Try reducing the period or check connection")
-            return
-        finally:
-            signal.alarm(0)  # Disable timeout
+            return None
 
-        # Transform data
-        rows_to_insert = []
-        total_rows_processed = 0
-        filtered_out_count = 0
-        
-        for insight in insights:
-            total_rows_processed += 1
-            # Get actions and action values data
-            actions = insight.get('actions', [])
-            action_values = insight.get('action_values', [])
-            
-            # Base row data
-            spend = float(insight.get('spend', 0))
-            
-            # Filter out rows with spend below threshold
-            if spend < ETLConfig.MIN_SPEND_THRESHOLD:
-                filtered_out_count += 1
-                continue
+        # Transform the report into a Parquet file one page at a time, and only copy it
+        # into the shared file once the whole report was read, so a failed chunk adds nothing
+        with tempfile.TemporaryFile() as chunk_file:
+            # Chunk files never leave the machine, so skip compressing them
+            with pq.ParquetWriter(chunk_file, arrow_schema, compression='none') as chunk_writer:
+                total_rows_processed, rows_to_load = write_insights_parquet(insights, chunk_writer)
             
-            row = {
-                'account_name': insight.get('account_name'),
-                'campaign': insight.get('campaign_name'),
-                'adset_name': insight.get('adset_name'),
-                'ad_name': insight.get('ad_name'),
-                'date': insight.get('date_start'),
-                'impressions': int(insight.get('impressions', 0)),
-                'clicks': int(insight.get('clicks', 0)),
-                'spend': spend,
-                'cpc': float(insight.get('cpc', 0)),
-                'cpm': float(insight.get('cpm', 0)),
-                'ctr': float(insight.get('ctr', 0)),
-                'frequency': float(insight.get('frequency', 0)),
-                'unique_ctr': float(insight.get('unique_ctr', 0)),
-            }
-            
-            # Add conversion/action data for each priority action
-            for action_type in action_priority:
-                # Get action count
-                action_count = get_action_value(actions, action_type)
-                
-                # Map action types to schema field names
-                if action_type == 'landing_page_view':
-                    count_field = 'landing_page_views'
-                    cost_field = 'cost_per_landing_page_view'
-                elif action_type == 'lead':
-                    count_field = 'leads'
-                    cost_field = 'cost_per_lead'
-                else:
-                    count_field = action_type
-                    cost_field = f'cost_per_{action_type}'
-                
-                row[count_field] = action_count
-                
-                # Get cost per action (if action count > 0)
-                if action_count > 0:
-                    cost_per_action = get_action_cost_value(action_values, action_type)
-                    if cost_per_action == 0.0 and row['spend'] > 0:
-                        # Fallback: calculate cost per action from spend
-                        cost_per_action = row['spend'] / action_count
-                    row[cost_field] = cost_per_action
-                else:
-                    row[cost_field] = 0.0
-            
-            rows_to_insert.append(row)
+            if rows_to_load:
+                chunk_file.seek(0)
+                append_parquet_file(chunk_file, writer, writer_lock)
+        filtered_out_count = total_rows_processed - rows_to_load
 
         # Show filtering statistics
-        print(f"📊 Data filtering results:")
+        print(f"📊 Data filtering results for {start_date}..{end_date}:")
         print(f"   Total rows from API: {total_rows_processed}")
         print(f"   Filtered out (spend < ${ETLConfig.MIN_SPEND_THRESHOLD}): {filtered_out_count}")
-        print(f"   Rows to insert: {len(rows_to_insert)}")
-        
-        if not rows_to_insert:
-            print("⚠️  No active campaigns/ads found (all below spend threshold)")
-            return
+        print(f"   Rows to insert: {rows_to_load}")
+        return rows_to_load
 
-        # Insert data into BigQuery
-        table_ref = client.dataset(dataset_id).table(table_id)
-        job_config = bigquery.LoadJobConfig()
-        job_config.schema = schema
-        job_config.source_format = bigquery.SourceFormat.NEWLINE_DELIMITED_JSON
-        job_config.write_disposition = bigquery.WriteDisposition.WRITE_APPEND
+    except Exception as e:
+        print(f"❌ An error occurred: {str(e)}")
+        return None
 
-        job = client.load_table_from_json(rows_to_insert, table_ref, job_config=job_config)
-        job.result()  # Wait for the job to complete
+def fetch_and_load_chunks(chunks: List[tuple], delete_existing: bool = True,
+                          max_workers: int = ETLConfig.MAX_CONCURRENT_REQUESTS):
+    """
+    Fetch date chunks concurrently, at most max_workers at a time, and load them together.
+    
+    Every chunk streams its pages into one shared Parquet file, which is
+    loaded once for the whole run by load_chunks instead of once per chunk.
+    """
+    if not chunks:
+        return
+    
+    report_runs = start_insights_reports(chunks)
+    writer_lock = threading.Lock()
+    # Never start more threads than there are chunks to fetch
+    max_workers = min(max_workers, len(chunks))
+    mount_connection_pool(fb_session(), max_workers)
+    
+    with tempfile.TemporaryFile() as parquet_file:
+        with pq.ParquetWriter(parquet_file, arrow_schema, compression=ETLConfig.PARQUET_COMPRESSION) as writer:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # Chunks without a started report fetch right away, the rest as their report finishes
+                futures = {chunk: executor.submit(fetch_chunk, *chunk, writer, writer_lock)
+                           for chunk in chunks if chunk not in report_runs}
+                for chunk, report_run in poll_insights_reports(report_runs):
+                    futures[chunk] = executor.submit(fetch_chunk, *chunk, writer, writer_lock, report_run)
+                chunk_rows = [futures[chunk].result() for chunk in chunks]
+        
+        # Only chunks that were fetched successfully may replace data in BigQuery
+        fetched_chunks = [chunk for chunk, rows in zip(chunks, chunk_rows) if rows is not None]
+        if len(fetched_chunks) < len(chunks):
+            print(f"⚠️  {len(chunks) - len(fetched_chunks)} chunk(s) failed and will not be loaded")
+        if not fetched_chunks:
+            return
+        
+        parquet_file.seek(0)
+        try:
+            load_chunks(parquet_file, fetched_chunks, sum(rows for rows in chunk_rows if rows), delete_existing)
+        except Exception as e:
+            print(f"❌ An error occurred while loading to BigQuery: {str(e)}")
 
-        if job.errors:
-            print(f"Errors occurred: {job.errors}")
-        else:
-            print(f"✅ Loaded {job.output_rows} rows into {dataset_id}:{table_id}")
+def fetch_and_load_data(start_date: datetime.date, end_date: datetime.date, delete_existing: bool = True,
+                        max_workers: int = ETLConfig.MAX_CONCURRENT_REQUESTS):
+    """Fetch data from Facebook API and load to BigQuery"""
+    fetch_and_load_chunks(split_date_range(start_date, end_date), delete_existing, max_workers)
 
-    except Exception as e:
-        print(f"❌ An error occurred: {str(e)}")
+def fetch_and_load_ranges(date_ranges: List[tuple], delete_existing: bool = True,
+                          max_workers: int = ETLConfig.MAX_CONCURRENT_REQUESTS):
+    """Split date ranges into API-sized chunks and fetch and load them all"""
+    # Re-fetched gap days are only safe to load when existing data is replaced
+    if delete_existing:
+        date_ranges = coalesce_date_ranges(date_ranges)
+    
+    chunks = [chunk for range_start, range_end in date_ranges
+              for chunk in split_date_range(range_start, range_end)]
+    
+    print(f"\n📊 Processing {len(chunks)} chunk(s) from {len(date_ranges)} range(s)")
+    fetch_and_load_chunks(chunks, delete_existing, max_workers)
 
 def main():
     """Main execution function"""
@@ -575,12 +1342,12 @@ def main():
     # Create table if it doesn't exist
     create_table_if_not_exists()
     
-    # Get existing dates from BigQuery
-    existing_dates = get_existing_dates()
-    
     # Define date range (you can modify this as needed)
     start_date, end_date = ETLConfig.get_default_date_range()
     
+    # Get existing dates from BigQuery
+    existing_dates = get_existing_dates(ETLConfig.MONITORING_WINDOW_DAYS, start_date, end_date)
+    
     # Get date ranges to fetch
     date_ranges = get_date_ranges_to_fetch(
         start_date=start_date,
@@ -594,25 +1361,8 @@ def main():
         print("🎉 All data is up to date!")
         return
     
-    # Process each date range
-    total_ranges = len(date_ranges)
-    for i, (range_start, range_end) in enumerate(date_ranges, 1):
-        print(f"\n📊 Processing range {i}/{total_ranges}")
-        
-        # Split large ranges into smaller chunks for API limits
-        current_start = range_start
-        while current_start <= range_end:
-            chunk_end = min(current_start + timedelta(days=ETLConfig.MAX_CHUNK_DAYS - 1), range_end)
-            
-            fetch_and_load_data(current_start, chunk_end)
-            
-            # Move to next chunk
-            current_start = chunk_end + timedelta(days=1)
-            
-            # Rate limiting
-            if current_start <= range_end:
-                print(f"⏳ Waiting {ETLConfig.RATE_LIMIT_DELAY} seconds...")
-                time.sleep(ETLConfig.RATE_LIMIT_DELAY)
+    # Split each date range into chunks for API limits
+    fetch_and_load_ranges(date_ranges)
     
     print("🎉 ETL process completed successfully!")
 
@@ -5,7 +5,10 @@ Command-line interface for Facebook Ads to BigQuery ETL
 
 import argparse
 import sys
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from google.api_core import exceptions as gcp_exceptions
+from google.cloud import bigquery
 from config import ETLConfig
 
 # Import the ETL functions
@@ -14,25 +17,37 @@ from facebook_ads_to_bigquery import (
     get_existing_dates,
     get_existing_dates_in_range,
     get_date_ranges_to_fetch,
+    get_latest_date_in_bq,
     get_missing_date_ranges_for_backfill,
-    fetch_and_load_data,
-    client,
-    account
+    fetch_and_load_ranges,
+    ONE_DAY,
+    bq_client,
+    daily_summary_table_id
 )
 
-def run_daily_sync():
+def positive_int(value):
+    """argparse type for options that need a whole number of at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def run_daily_sync(jobs=ETLConfig.MAX_CONCURRENT_REQUESTS):
     """Run daily sync - check for missing data in recent days"""
     print("🔄 Running daily sync...")
     
     # Create table if needed
     create_table_if_not_exists()
     
-    # Get existing dates (only last N days for efficiency)
-    existing_dates = get_existing_dates(ETLConfig.MONITORING_WINDOW_DAYS)
-    
     # Use default date range
     start_date, end_date = ETLConfig.get_default_date_range()
     
+    # Get existing dates (only last N days for efficiency)
+    existing_dates = get_existing_dates(ETLConfig.MONITORING_WINDOW_DAYS, start_date, end_date)
+    
     print(f"Checking date range: {start_date} to {end_date}")
     
     # Get missing date ranges
@@ -49,12 +64,11 @@ def run_daily_sync():
         return
     
     # Process ranges
-    for range_start, range_end in date_ranges:
-        fetch_and_load_data(range_start, range_end)
+    fetch_and_load_ranges(date_ranges, max_workers=jobs)
     
     print("✅ Daily sync completed!")
 
-def run_backfill(days_back=365):
+def run_backfill(days_back=365, jobs=ETLConfig.MAX_CONCURRENT_REQUESTS):
     """Run historical backfill"""
     print(f"⏳ Running backfill for last {days_back} days...")
     
@@ -80,35 +94,16 @@ def run_backfill(days_back=365):
         print("✅ All historical data is already loaded!")
         return
     
-    # Process ranges with chunking
-    import time
-    total_ranges = len(date_ranges)
-    
-    for i, (range_start, range_end) in enumerate(date_ranges, 1):
-        print(f"\n📊 Processing range {i}/{total_ranges}: {range_start} to {range_end}")
-        
-        # Split large ranges into chunks
-        current_start = range_start
-        while current_start <= range_end:
-            chunk_end = min(current_start + timedelta(days=ETLConfig.MAX_CHUNK_DAYS - 1), range_end)
-            
-            fetch_and_load_data(current_start, chunk_end)
-            
-            # Move to next chunk
-            current_start = chunk_end + timedelta(days=1)
-            
-            # Rate limiting
-            if current_start <= range_end:
-                print(f"⏳ Waiting {ETLConfig.RATE_LIMIT_DELAY} seconds...")
-                time.sleep(ETLConfig.RATE_LIMIT_DELAY)
+    # Process ranges with chunking (every fetch backs off on API usage itself)
+    fetch_and_load_ranges(date_ranges, max_workers=jobs)
     
     print("✅ Backfill completed!")
 
-def run_custom_range(start_date_str, end_date_str, force_rewrite=False):
+def run_custom_range(start_date_str, end_date_str, force_rewrite=False, jobs=ETLConfig.MAX_CONCURRENT_REQUESTS):
     """Run ETL for custom date range"""
     try:
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+        start_date = date.fromisoformat(start_date_str)
+        end_date = date.fromisoformat(end_date_str)
     except ValueError:
         print("❌ Invalid date format. Use YYYY-MM-DD")
         return
@@ -125,14 +120,10 @@ def run_custom_range(start_date_str, end_date_str, force_rewrite=False):
     if force_rewrite:
         print("🔥 Force rewrite enabled - will overwrite existing data")
         # Split into chunks and process
-        current_start = start_date
-        while current_start <= end_date:
-            chunk_end = min(current_start + timedelta(days=ETLConfig.MAX_CHUNK_DAYS - 1), end_date)
-            fetch_and_load_data(current_start, chunk_end, delete_existing=True)
-            current_start = chunk_end + timedelta(days=1)
+        fetch_and_load_ranges([(start_date, end_date)], delete_existing=True, max_workers=jobs)
     else:
         # Get existing dates and find missing ranges
-        existing_dates = get_existing_dates(ETLConfig.MONITORING_WINDOW_DAYS)
+        existing_dates = get_existing_dates(ETLConfig.MONITORING_WINDOW_DAYS, start_date, end_date)
         
         date_ranges = get_date_ranges_to_fetch(
             start_date=start_date,
@@ -147,36 +138,64 @@ def run_custom_range(start_date_str, end_date_str, force_rewrite=False):
             return
         
         # Process missing ranges
-        for range_start, range_end in date_ranges:
-            # Split into chunks
-            current_start = range_start
-            while current_start <= range_end:
-                chunk_end = min(current_start + timedelta(days=ETLConfig.MAX_CHUNK_DAYS - 1), range_end)
-                fetch_and_load_data(current_start, chunk_end)
-                current_start = chunk_end + timedelta(days=1)
+        fetch_and_load_ranges(date_ranges, max_workers=jobs)
     
     print("✅ Custom range ETL completed!")
 
+def get_status_summary():
+    """
+    Get the table totals shown by the status report
+    
+    Reads the per-day summary view (one row per day) when the ETL has
+    created it, and falls back to aggregating the table itself otherwise.
+    """
+    summary_query = f"""
+    SELECT 
+        MIN(date) as earliest_date,
+        MAX(date) as latest_date,
+        COUNT(DISTINCT date) as total_days,
+        SUM(total_rows) as total_rows,
+        SUM(total_spend) as total_spend,
+        SUM(total_impressions) as total_impressions,
+        SUM(total_clicks) as total_clicks
+    FROM `{ETLConfig.DATASET_ID}.{daily_summary_table_id}`
+    """
+    table_query = f"""
+    SELECT 
+        MIN(date) as earliest_date,
+        MAX(date) as latest_date,
+        COUNT(DISTINCT date) as total_days,
+        COUNT(*) as total_rows,
+        SUM(spend) as total_spend,
+        SUM(impressions) as total_impressions,
+        SUM(clicks) as total_clicks
+    FROM `{ETLConfig.DATASET_ID}.{ETLConfig.TABLE_ID}`
+    """
+    
+    # The query texts never change, so repeated status checks are served
+    # from the query cache until the table is written again
+    job_config = bigquery.QueryJobConfig(use_query_cache=True)
+    try:
+        return list(bq_client().query(summary_query, job_config=job_config).result())
+    except gcp_exceptions.GoogleAPIError as e:
+        print(f"⚠️  Daily summary view unavailable, aggregating the table instead: {e}")
+        return list(bq_client().query(table_query, job_config=job_config).result())
+
 def show_status():
     """Show current status of data in BigQuery"""
     print("📊 Data Status Report")
     print("=" * 50)
     
     try:
-        # Get basic table info
-        query = f"""
-        SELECT 
-            MIN(date) as earliest_date,
-            MAX(date) as latest_date,
-            COUNT(DISTINCT date) as total_days,
-            COUNT(*) as total_rows,
-            SUM(spend) as total_spend,
-            SUM(impressions) as total_impressions,
-            SUM(clicks) as total_clicks
-        FROM `{ETLConfig.DATASET_ID}.{ETLConfig.TABLE_ID}`
-        """
+        # Get basic table info and the latest loaded partition in parallel, on
+        # one client built here first so the two workers don't each create one
+        bq_client()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            summary_future = executor.submit(get_status_summary)
+            latest_date_future = executor.submit(get_latest_date_in_bq)
+            results = summary_future.result()
+            latest_date_in_bq = latest_date_future.result()
         
-        results = client.query(query)
         for row in results:
             print(f"Date Range: {row.earliest_date} to {row.latest_date}")
             print(f"Total Days: {row.total_days}")
@@ -186,16 +205,17 @@ def show_status():
             print(f"Total Clicks: {row.total_clicks:,}")
         
         # Check for missing dates in recent monitoring window
-        end_date = datetime.now().date() - timedelta(days=1)
+        end_date = datetime.now().date() - ONE_DAY
         start_date = end_date - timedelta(days=ETLConfig.MONITORING_WINDOW_DAYS)
         
-        existing_dates = get_existing_dates(ETLConfig.MONITORING_WINDOW_DAYS)
+        existing_dates = get_existing_dates(ETLConfig.MONITORING_WINDOW_DAYS, start_date, end_date)
         date_ranges = get_date_ranges_to_fetch(
             start_date, 
             end_date, 
             existing_dates, 
             rewrite_last_n_days=0,
-            monitoring_window_days=ETLConfig.MONITORING_WINDOW_DAYS
+            monitoring_window_days=ETLConfig.MONITORING_WINDOW_DAYS,
+            latest_date_in_bq=latest_date_in_bq
         )
         
         if date_ranges:
@@ -214,38 +234,39 @@ def show_status():
 def main():
     parser = argparse.ArgumentParser(description='Facebook Ads to BigQuery ETL')
     
+    parser.set_defaults(func=lambda args: run_daily_sync())
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
+    # Shared option for the commands that fetch from Facebook
+    jobs_parser = argparse.ArgumentParser(add_help=False)
+    jobs_parser.add_argument('--jobs', type=positive_int, default=ETLConfig.MAX_CONCURRENT_REQUESTS,
+                             help=f'Date chunks to fetch in parallel (default: {ETLConfig.MAX_CONCURRENT_REQUESTS})')
+    
     # Daily sync command
-    daily_parser = subparsers.add_parser('daily', help='Run daily sync (default)')
+    daily_parser = subparsers.add_parser('daily', parents=[jobs_parser], help='Run daily sync (default)')
+    daily_parser.set_defaults(func=lambda args: run_daily_sync(args.jobs))
     
     # Backfill command
-    backfill_parser = subparsers.add_parser('backfill', help='Run historical backfill')
+    backfill_parser = subparsers.add_parser('backfill', parents=[jobs_parser], help='Run historical backfill')
     backfill_parser.add_argument('--days', type=int, default=365, 
                                 help='Number of days to backfill (default: 365)')
+    backfill_parser.set_defaults(func=lambda args: run_backfill(args.days, args.jobs))
     
     # Custom range command
-    custom_parser = subparsers.add_parser('custom', help='Run ETL for custom date range')
+    custom_parser = subparsers.add_parser('custom', parents=[jobs_parser], help='Run ETL for custom date range')
     custom_parser.add_argument('start_date', help='Start date (YYYY-MM-DD)')
     custom_parser.add_argument('end_date', help='End date (YYYY-MM-DD)')
     custom_parser.add_argument('--force', action='store_true', 
                               help='Force rewrite existing data')
+    custom_parser.set_defaults(func=lambda args: run_custom_range(args.start_date, args.end_date, args.force, args.jobs))
     
     # Status command
     status_parser = subparsers.add_parser('status', help='Show data status')
+    status_parser.set_defaults(func=lambda args: show_status())
     
     args = parser.parse_args()
     
-    if args.command == 'daily' or args.command is None:
-        run_daily_sync()
-    elif args.command == 'backfill':
-        run_backfill(args.days)
-    elif args.command == 'custom':
-        run_custom_range(args.start_date, args.end_date, args.force)
-    elif args.command == 'status':
-        show_status()
-    else:
-        parser.print_help()
+    args.func(args)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for turning raw insight rows into BigQuery rows
+"""
+
+import io
+import unittest
+
+import pyarrow.parquet as pq
+
+import facebook_ads_to_bigquery as etl
+
+
+def convert(insights):
+    """Run raw insight rows through the Parquet transform and read the written rows back"""
+    buffer = io.BytesIO()
+    with pq.ParquetWriter(buffer, etl.arrow_schema) as writer:
+        etl.write_insights_parquet(insights, writer)
+    buffer.seek(0)
+    return pq.read_table(buffer).to_pylist()
+
+
+def insight(**fields):
+    """A raw insight row with spend above the threshold"""
+    row = {
+        'account_name': 'Account',
+        'campaign_name': 'Campaign',
+        'adset_name': 'Ad set',
+        'ad_name': 'Ad',
+        'date_start': '2024-01-01',
+        'impressions': '100',
+        'clicks': '5',
+        'spend': '10.00',
+    }
+    row.update(fields)
+    return row
+
+
+class ActionConversionTest(unittest.TestCase):
+
+    def test_counts_and_costs_from_well_formed_actions(self):
+        [row] = convert([insight(
+            actions=[{'action_type': 'lead', 'value': '2'}, {'action_type': 'purchase', 'value': '1'}],
+            action_values=[{'action_type': 'purchase', 'value': '49.90'}],
+        )])
+
+        self.assertEqual(row['leads'], 2)
+        self.assertEqual(row['purchase'], 1)
+        self.assertEqual(row['cost_per_purchase'], 49.90)
+        self.assertEqual(row['add_to_cart'], 0)
+
+    def test_malformed_action_elements_are_skipped(self):
+        rows = convert([
+            insight(
+                actions=['lead', None, 3, {'action_type': 'lead', 'value': '4'}],
+                action_values=[['purchase', '10'], {'action_type': 'lead', 'value': '8.50'}],
+            ),
+            insight(ad_name='Other ad', actions=[{'action_type': 'purchase', 'value': '1'}]),
+        ])
+
+        # The malformed row keeps its well-formed actions and doesn't fail the page
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['leads'], 4)
+        self.assertEqual(rows[0]['cost_per_lead'], 8.50)
+        self.assertEqual(rows[0]['purchase'], 0)
+        self.assertEqual(rows[1]['purchase'], 1)
+
+    def test_malformed_action_values_become_zero(self):
+        [row] = convert([insight(
+            actions=[{'action_type': 'lead', 'value': 'n/a'}, {'action_type': 'purchase', 'value': {'x': 1}}],
+        )])
+
+        self.assertEqual(row['leads'], 0)
+        self.assertEqual(row['purchase'], 0)
+
+
+class ActionValueParsingTest(unittest.TestCase):
+    """The vectorised column parse gives what parse_count/parse_cost give value by value"""
+
+    values = ['12', '12.5', ' 3', '', 'abc', '-7', '+4', '1e3', '.5', '0012', '1_000', '١٢', '\xa06']
+
+    def test_counts(self):
+        column = etl.parse_action_column(self.values, etl.arrow_schema.field('leads').type,
+                                         etl.count_pattern, etl.parse_count)
+
+        self.assertEqual(column.to_pylist(), [12, 0, 3, 0, 0, -7, 4, 0, 0, 12, 1000, 12, 6])
+        self.assertEqual(column.to_pylist(), [etl.parse_count(value) for value in self.values])
+
+    def test_costs(self):
+        column = etl.parse_action_column(self.values, etl.arrow_schema.field('cost_per_lead').type,
+                                         etl.cost_pattern, etl.parse_cost)
+
+        self.assertEqual(column.to_pylist(),
+                         [12.0, 12.5, 3.0, 0.0, 0.0, -7.0, 4.0, 1000.0, 0.5, 12.0, 1000.0, 12.0, 6.0])
+        self.assertEqual(column.to_pylist(), [etl.parse_cost(value) for value in self.values])
+
+
+if __name__ == '__main__':
+    unittest.main()
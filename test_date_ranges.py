@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for the existing-date lookups and date range planning
+"""
+
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import facebook_ads_to_bigquery as etl
+from config import ETLConfig
+
+
+def loaded_days(first_day, last_day):
+    """Every date from first_day to last_day, as get_partition_dates returns them"""
+    return frozenset(first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1))
+
+
+class StaleTableTest(unittest.TestCase):
+    """The table's latest partition is a few days behind yesterday"""
+
+    def setUp(self):
+        self.today = datetime.now().date()
+        self.yesterday = self.today - etl.ONE_DAY
+        self.latest = self.today - timedelta(days=4)
+        partitions = loaded_days(self.today - timedelta(days=60), self.latest)
+
+        patcher = mock.patch.object(etl, 'get_partition_dates', return_value=partitions)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_existing_dates_window_ends_at_latest_loaded_date(self):
+        existing_dates = etl.get_existing_dates(ETLConfig.MONITORING_WINDOW_DAYS)
+
+        window_start = self.latest - timedelta(days=ETLConfig.MONITORING_WINDOW_DAYS - 1)
+        self.assertEqual(existing_dates, loaded_days(window_start, self.latest))
+
+    def test_daily_sync_only_fetches_days_after_latest(self):
+        start_date, end_date = ETLConfig.get_default_date_range()
+        existing_dates = etl.get_existing_dates(ETLConfig.MONITORING_WINDOW_DAYS, start_date, end_date)
+
+        date_ranges = etl.get_date_ranges_to_fetch(
+            start_date=start_date,
+            end_date=end_date,
+            existing_dates=existing_dates,
+            rewrite_last_n_days=1,
+            monitoring_window_days=ETLConfig.MONITORING_WINDOW_DAYS
+        )
+
+        # Only the rewritten latest date and the gap up to yesterday
+        self.assertEqual(date_ranges, [(self.latest, self.yesterday)])
+
+    def test_status_window_reports_only_days_after_latest(self):
+        end_date = self.yesterday
+        start_date = end_date - timedelta(days=ETLConfig.MONITORING_WINDOW_DAYS)
+        existing_dates = etl.get_existing_dates(ETLConfig.MONITORING_WINDOW_DAYS, start_date, end_date)
+
+        date_ranges = etl.get_date_ranges_to_fetch(
+            start_date, end_date, existing_dates,
+            rewrite_last_n_days=0,
+            monitoring_window_days=ETLConfig.MONITORING_WINDOW_DAYS
+        )
+
+        self.assertEqual(date_ranges, [(self.latest + etl.ONE_DAY, self.yesterday)])
+
+
+
+class FindMissingRangesTest(unittest.TestCase):
+    """Gaps between the loaded days of a requested range"""
+
+    def setUp(self):
+        self.start = datetime(2024, 1, 1).date()
+        self.end = datetime(2024, 1, 10).date()
+
+    def day(self, offset):
+        return self.start + timedelta(days=offset)
+
+    def test_no_existing_dates(self):
+        self.assertEqual(etl.find_missing_ranges(self.start, self.end, set()), [(self.start, self.end)])
+
+    def test_fully_covered(self):
+        self.assertEqual(etl.find_missing_ranges(self.start, self.end, loaded_days(self.start, self.end)), [])
+
+    def test_holes_at_both_edges_and_inside(self):
+        existing = loaded_days(self.day(2), self.day(4)) | loaded_days(self.day(6), self.day(7))
+        self.assertEqual(etl.find_missing_ranges(self.start, self.end, existing),
+                         [(self.day(0), self.day(1)), (self.day(5), self.day(5)), (self.day(8), self.end)])
+
+    def test_existing_dates_outside_the_range_are_ignored(self):
+        existing = {self.start - timedelta(days=1), self.day(0), self.end + timedelta(days=1)}
+        self.assertEqual(etl.find_missing_ranges(self.start, self.end, existing), [(self.day(1), self.end)])
+
+    def test_single_day_range(self):
+        self.assertEqual(etl.find_missing_ranges(self.start, self.start, set()), [(self.start, self.start)])
+        self.assertEqual(etl.find_missing_ranges(self.start, self.start, {self.start}), [])
+
+
+class GroupConsecutiveDaysTest(unittest.TestCase):
+    """Day ordinals grouped into ranges of consecutive days"""
+
+    def setUp(self):
+        self.day = datetime(2024, 1, 1).date()
+
+    def test_no_days(self):
+        self.assertEqual(etl.group_consecutive_days([]), [])
+
+    def test_single_day(self):
+        self.assertEqual(etl.group_consecutive_days([self.day.toordinal()]), [(self.day, self.day)])
+
+    def test_unsorted_days_with_holes(self):
+        ordinals = [self.day.toordinal() + offset for offset in (5, 0, 1, 2, 7, 6, 9)]
+        self.assertEqual(etl.group_consecutive_days(ordinals), [
+            (self.day, self.day + timedelta(days=2)),
+            (self.day + timedelta(days=5), self.day + timedelta(days=7)),
+            (self.day + timedelta(days=9), self.day + timedelta(days=9)),
+        ])
+
+
+class CoalesceDateRangesTest(unittest.TestCase):
+    """Missing ranges a few days apart are fetched as one range"""
+
+    def setUp(self):
+        self.day = datetime(2024, 1, 1).date()
+
+    def days(self, start_offset, end_offset):
+        return (self.day + timedelta(days=start_offset), self.day + timedelta(days=end_offset))
+
+    def test_empty_input(self):
+        self.assertEqual(etl.coalesce_date_ranges([]), [])
+
+    def test_adjacent_ranges_merge(self):
+        self.assertEqual(etl.coalesce_date_ranges([self.days(0, 2), self.days(3, 4)]),
+                         [self.days(0, 4)])
+
+    def test_gap_of_max_gap_days_merges(self):
+        gap = ETLConfig.COALESCE_GAP_DAYS
+        self.assertEqual(etl.coalesce_date_ranges([self.days(0, 1), self.days(2 + gap, 5 + gap)]),
+                         [self.days(0, 5 + gap)])
+
+    def test_gap_of_one_more_day_stays_separate(self):
+        gap = ETLConfig.COALESCE_GAP_DAYS + 1
+        ranges = [self.days(0, 1), self.days(2 + gap, 5 + gap)]
+        self.assertEqual(etl.coalesce_date_ranges(ranges), ranges)
+
+    def test_unsorted_and_overlapping_input(self):
+        ranges = [self.days(20, 20), self.days(3, 4), self.days(0, 10)]
+        self.assertEqual(etl.coalesce_date_ranges(ranges), [self.days(0, 10), self.days(20, 20)])
+
+    def test_explicit_max_gap_days(self):
+        ranges = [self.days(0, 0), self.days(2, 2)]
+        self.assertEqual(etl.coalesce_date_ranges(ranges, max_gap_days=0), ranges)
+        self.assertEqual(etl.coalesce_date_ranges(ranges, max_gap_days=1), [self.days(0, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()